@@ -1,92 +1,191 @@
 #!/usr/bin/env python3
 """
 Configuration file for Code du Travail AI Bots (Telegram and Email)
+
+Settings are read from the environment lazily and cached on first access,
+so importing this module costs nothing and unused settings are never
+parsed. Call Config.reload() after changing environment variables.
 """
 
+import functools
 import os
-from typing import Dict, Any
+from typing import Any, Dict
+
+# Cached readers registered here so Config.reload() can clear them all
+_cached_readers = []
+
+def _cached(func):
+    """Cache a config reader so each env var is parsed at most once"""
+    cached = functools.lru_cache(maxsize=None)(func)
+    _cached_readers.append(cached)
+    return cached
 
 class Config:
     """Configuration class for both Telegram and Email bots"""
-    
+
     # Telegram settings
-    TELEGRAM_BOT_TOKEN: str = os.getenv('TELEGRAM_BOT_TOKEN', '')
-    
+    @classmethod
+    @_cached
+    def telegram_bot_token(cls) -> str:
+        return os.getenv('TELEGRAM_BOT_TOKEN', '')
+
     # Email settings (Docker-Mailserver)
-    EMAIL_ADDRESS: str = os.getenv('EMAIL_ADDRESS', '')
-    EMAIL_PASSWORD: str = os.getenv('EMAIL_PASSWORD', '')
-    EMAIL_DOMAIN: str = os.getenv('EMAIL_DOMAIN', '')
-    
+    @classmethod
+    @_cached
+    def email_address(cls) -> str:
+        return os.getenv('EMAIL_ADDRESS', '')
+
+    @classmethod
+    @_cached
+    def email_password(cls) -> str:
+        return os.getenv('EMAIL_PASSWORD', '')
+
+    @classmethod
+    @_cached
+    def email_domain(cls) -> str:
+        return os.getenv('EMAIL_DOMAIN', '')
+
     # Email server settings
-    IMAP_HOST: str = os.getenv('IMAP_HOST', 'localhost')
-    IMAP_PORT: int = int(os.getenv('IMAP_PORT', '993'))
-    SMTP_HOST: str = os.getenv('SMTP_HOST', 'localhost')
-    SMTP_PORT: int = int(os.getenv('SMTP_PORT', '587'))
-    
+    @classmethod
+    @_cached
+    def imap_host(cls) -> str:
+        return os.getenv('IMAP_HOST', 'localhost')
+
+    @classmethod
+    @_cached
+    def imap_port(cls) -> int:
+        return int(os.getenv('IMAP_PORT', '993'))
+
+    @classmethod
+    @_cached
+    def smtp_host(cls) -> str:
+        return os.getenv('SMTP_HOST', 'localhost')
+
+    @classmethod
+    @_cached
+    def smtp_port(cls) -> int:
+        return int(os.getenv('SMTP_PORT', '587'))
+
     # Model settings
-    MODEL_NAME: str = os.getenv('MODEL_NAME', 'Pyzeur/Code-du-Travail-mistral-finetune')
-    DEVICE: str = os.getenv('DEVICE', 'auto')
-    MAX_LENGTH: int = int(os.getenv('MAX_LENGTH', '2048'))
-    HUGGING_FACE_TOKEN: str = os.getenv('HUGGING_FACE_TOKEN', '')
-    
+    @classmethod
+    @_cached
+    def model_name(cls) -> str:
+        return os.getenv('MODEL_NAME', 'Pyzeur/Code-du-Travail-mistral-finetune')
+
+    @classmethod
+    @_cached
+    def device(cls) -> str:
+        return os.getenv('DEVICE', 'auto')
+
+    @classmethod
+    @_cached
+    def max_length(cls) -> int:
+        return int(os.getenv('MAX_LENGTH', '2048'))
+
+    @classmethod
+    @_cached
+    def hugging_face_token(cls) -> str:
+        return os.getenv('HUGGING_FACE_TOKEN', '')
+
     # Telegram generation parameters
-    TELEGRAM_GENERATION_CONFIG: Dict[str, Any] = {
-        'max_new_tokens': 512,
-        'do_sample': True,
-        'temperature': 0.7,
-        'top_p': 0.9,
-        'top_k': 50,
-        'repetition_penalty': 1.1
-    }
-    
+    @classmethod
+    @_cached
+    def telegram_generation_config(cls) -> Dict[str, Any]:
+        return {
+            'max_new_tokens': 512,
+            'do_sample': True,
+            'temperature': 0.7,
+            'top_p': 0.9,
+            'top_k': 50,
+            'repetition_penalty': 1.1
+        }
+
     # Email generation parameters (optimized for longer, more detailed responses)
-    EMAIL_GENERATION_CONFIG: Dict[str, Any] = {
-        'max_new_tokens': int(os.getenv('EMAIL_MAX_TOKENS', '1500')),
-        'do_sample': True,
-        'temperature': float(os.getenv('EMAIL_TEMPERATURE', '0.3')),
-        'top_p': float(os.getenv('EMAIL_TOP_P', '0.95')),
-        'top_k': int(os.getenv('EMAIL_TOP_K', '50')),
-        'repetition_penalty': float(os.getenv('EMAIL_REPETITION_PENALTY', '1.15'))
-    }
-    
+    @classmethod
+    @_cached
+    def email_generation_config(cls) -> Dict[str, Any]:
+        return {
+            'max_new_tokens': int(os.getenv('EMAIL_MAX_TOKENS', '1500')),
+            'do_sample': True,
+            'temperature': float(os.getenv('EMAIL_TEMPERATURE', '0.3')),
+            'top_p': float(os.getenv('EMAIL_TOP_P', '0.95')),
+            'top_k': int(os.getenv('EMAIL_TOP_K', '50')),
+            'repetition_penalty': float(os.getenv('EMAIL_REPETITION_PENALTY', '1.15'))
+        }
+
     # Email bot settings
-    EMAIL_CHECK_INTERVAL: int = int(os.getenv('EMAIL_CHECK_INTERVAL', '30'))
-    EMAIL_SIGNATURE: str = os.getenv('EMAIL_SIGNATURE', 'Assistant IA Code du Travail - ColonyLab')
-    EMAIL_DISCLAIMER: str = os.getenv('EMAIL_DISCLAIMER', 
-        'Cette réponse est fournie à titre informatif uniquement. '
-        'Pour des conseils juridiques précis et personnalisés, '
-        'consultez un avocat spécialisé en droit du travail.')
-    
+    @classmethod
+    @_cached
+    def email_check_interval(cls) -> int:
+        return int(os.getenv('EMAIL_CHECK_INTERVAL', '30'))
+
+    @classmethod
+    @_cached
+    def email_signature(cls) -> str:
+        return os.getenv('EMAIL_SIGNATURE', 'Assistant IA Code du Travail - ColonyLab')
+
+    @classmethod
+    @_cached
+    def email_disclaimer(cls) -> str:
+        return os.getenv('EMAIL_DISCLAIMER',
+            'Cette réponse est fournie à titre informatif uniquement. '
+            'Pour des conseils juridiques précis et personnalisés, '
+            'consultez un avocat spécialisé en droit du travail.')
+
     # Quantization settings
-    USE_QUANTIZATION: bool = os.getenv('USE_QUANTIZATION', 'true').lower() == 'true'
-    LOAD_IN_4BIT: bool = os.getenv('LOAD_IN_4BIT', 'true').lower() == 'true'
-    
+    @classmethod
+    @_cached
+    def use_quantization(cls) -> bool:
+        return os.getenv('USE_QUANTIZATION', 'true').lower() == 'true'
+
+    @classmethod
+    @_cached
+    def load_in_4bit(cls) -> bool:
+        return os.getenv('LOAD_IN_4BIT', 'true').lower() == 'true'
+
     # Logging
-    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
-    EMAIL_LOG_LEVEL: str = os.getenv('EMAIL_LOG_LEVEL', 'INFO')
-    LOG_FILE: str = os.getenv('LOG_FILE', 'bot.log')
-    
+    @classmethod
+    @_cached
+    def log_level(cls) -> str:
+        return os.getenv('LOG_LEVEL', 'INFO')
+
+    @classmethod
+    @_cached
+    def email_log_level(cls) -> str:
+        return os.getenv('EMAIL_LOG_LEVEL', 'INFO')
+
+    @classmethod
+    @_cached
+    def log_file(cls) -> str:
+        return os.getenv('LOG_FILE', 'bot.log')
+
+    @classmethod
+    def reload(cls) -> None:
+        """Clear all cached settings so they are re-read from the environment"""
+        for reader in _cached_readers:
+            reader.cache_clear()
+
     @classmethod
     def validate_telegram(cls) -> bool:
         """Validate Telegram configuration"""
-        if not cls.TELEGRAM_BOT_TOKEN:
+        if not cls.telegram_bot_token():
             raise ValueError("TELEGRAM_BOT_TOKEN is required for Telegram bot")
         return True
-    
+
     @classmethod
     def validate_email(cls) -> bool:
         """Validate Email configuration"""
-        if not cls.EMAIL_ADDRESS:
+        if not cls.email_address():
             raise ValueError("EMAIL_ADDRESS is required for Email bot")
-        if not cls.EMAIL_PASSWORD:
+        if not cls.email_password():
             raise ValueError("EMAIL_PASSWORD is required for Email bot")
-        if not cls.EMAIL_DOMAIN:
+        if not cls.email_domain():
             raise ValueError("EMAIL_DOMAIN is required for Email bot")
         return True
-    
+
     @classmethod
     def validate_all(cls) -> bool:
         """Validate all configuration"""
         cls.validate_telegram()
         cls.validate_email()
-        return True
\ No newline at end of file
+        return True
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Standalone health check for Code du Travail AI Bots
+
+Runs all checks in parallel so wall time is the slowest single check
+instead of the sum (nvidia-smi alone can block for seconds). Intended
+for Docker HEALTHCHECK and cron monitoring; deliberately avoids
+importing the bot modules so it never drags in torch. For the fastest
+startup invoke it as `python -S -I health_check.py` to skip site
+customization.
+"""
+
+import functools
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import psutil
+
+# NVML queries the driver directly (sub-ms) instead of forking nvidia-smi
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
+def ttl_cache(ttl):
+    """Cache a zero-argument check result for ttl seconds
+
+    Under rapid polling (e.g. a 1s liveness probe) this amortizes the
+    underlying stat/statvfs/NVML calls across polls.
+    """
+    def decorator(func):
+        state = {}
+
+        @functools.wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            entry = state.get('entry')
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            value = func()
+            state['entry'] = (now + ttl, value)
+            return value
+
+        return wrapper
+    return decorator
+
+# Cached handle of the bot process found last time, revalidated cheaply
+_bot_proc = None
+
+def check_process():
+    """Check that a bot process is running"""
+    global _bot_proc
+
+    if _bot_proc is not None:
+        try:
+            if _bot_proc.is_running():
+                return True, f"Bot process running (pid {_bot_proc.pid})"
+        except psutil.NoSuchProcess:
+            pass
+        _bot_proc = None
+
+    targets = ('run.py', 'telegram_bot.py', 'mailserver_email_bot.py')
+    for proc in psutil.process_iter(['cmdline']):
+        try:
+            cmdline = ' '.join(proc.info['cmdline'] or [])
+            if any(target in cmdline for target in targets):
+                _bot_proc = proc
+                return True, f"Bot process running (pid {proc.pid})"
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return False, "No bot process found"
+
+@ttl_cache(5)
+def check_disk_space():
+    """Check that the disk is not close to full"""
+    disk = psutil.disk_usage('/')
+    if disk.percent >= 90:
+        return False, f"Disk almost full: {disk.percent}% used"
+    return True, f"Disk OK: {disk.percent}% used"
+
+@ttl_cache(5)
+def check_memory():
+    """Check that memory pressure is reasonable"""
+    memory = psutil.virtual_memory()
+    if memory.percent >= 90:
+        return False, f"Memory pressure: {memory.percent}% used"
+    return True, f"Memory OK: {memory.percent}% used"
+
+@ttl_cache(5)
+def check_gpu():
+    """Check GPU state via NVML, falling back to nvidia-smi (no GPU is not an error)"""
+    if PYNVML_AVAILABLE:
+        try:
+            pynvml.nvmlInit()
+            try:
+                if pynvml.nvmlDeviceGetCount() == 0:
+                    return True, "No GPU detected (CPU mode)"
+                handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+                mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                util = pynvml.nvmlDeviceGetUtilizationRates(handle)
+                return True, (f"GPU OK: {mem.used // (1024 ** 2)}/"
+                              f"{mem.total // (1024 ** 2)} MiB used, "
+                              f"{util.gpu}% utilization")
+            finally:
+                pynvml.nvmlShutdown()
+        except pynvml.NVMLError:
+            return True, "No GPU detected (CPU mode)"
+
+    return _check_gpu_nvidia_smi()
+
+def _check_gpu_nvidia_smi():
+    """Fallback GPU check that forks nvidia-smi"""
+    try:
+        result = subprocess.run(
+            ['nvidia-smi', '--query-gpu=memory.used,memory.total,utilization.gpu',
+             '--format=csv,noheader,nounits'],
+            capture_output=True, text=True, timeout=10
+        )
+        if result.returncode != 0:
+            return True, "No GPU detected (CPU mode)"
+        used, total, util = result.stdout.strip().split('\n')[0].split(', ')
+        return True, f"GPU OK: {used}/{total} MiB used, {util}% utilization"
+    except FileNotFoundError:
+        return True, "No GPU detected (CPU mode)"
+    except subprocess.TimeoutExpired:
+        return False, "nvidia-smi timed out"
+
+@ttl_cache(5)
+def check_log_file():
+    """Check that the log file has not grown out of control"""
+    try:
+        size = os.stat('logs/mailserver_email_bot.log').st_size
+    except FileNotFoundError:
+        return True, "No log file yet"
+    if size > 100 * 1024 * 1024:
+        return False, f"Log file too large: {size // (1024 * 1024)} MB"
+    return True, f"Log file OK: {size // 1024} KB"
+
+def check_model_stack():
+    """Check the model stack is installed without importing it
+
+    find_spec only scans path metadata; actually importing torch and
+    transformers costs seconds, which would defeat the point of a fast
+    health probe.
+    """
+    missing = [name for name in ('torch', 'transformers', 'peft')
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        return False, f"Missing model dependencies: {', '.join(missing)}"
+    return True, "Model stack installed (torch, transformers, peft)"
+
+def check_config():
+    """Check configuration presence without importing the bot modules"""
+    if Path('.env').exists():
+        return True, ".env file present"
+    if os.getenv('TELEGRAM_BOT_TOKEN') or os.getenv('EMAIL_ADDRESS'):
+        return True, "Configuration found in environment"
+    return False, "No .env file and no configuration in environment"
+
+def main():
+    checks = [
+        ('process', check_process),
+        ('disk', check_disk_space),
+        ('memory', check_memory),
+        ('gpu', check_gpu),
+        ('log file', check_log_file),
+        ('model stack', check_model_stack),
+        ('config', check_config),
+    ]
+
+    # Run every check concurrently: total wall time is the slowest check
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {executor.submit(func): name for name, func in checks}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = (False, f"Check crashed: {e}")
+
+    # Print in the declared order regardless of completion order
+    all_ok = True
+    for name, _ in checks:
+        ok, message = results[name]
+        print(f"{'✅' if ok else '❌'} {name}: {message}")
+        all_ok = all_ok and ok
+
+    sys.exit(0 if all_ok else 1)
+
+if __name__ == '__main__':
+    main()
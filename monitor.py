@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Simple resource monitor for Code du Travail AI Bots
+
+Samples CPU, memory, disk, GPU and bot-process usage once or
+continuously (--continuous -i N). CPU sampling uses psutil's
+non-blocking sliding-window form, primed once at startup; in continuous
+mode the loop's own interval provides the measurement window, while a
+one-shot snapshot waits out a short window itself before sampling.
+"""
+
+import argparse
+import subprocess
+import time
+
+import psutil
+
+# NVML reads GPU counters in-process instead of forking nvidia-smi per sample
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
+class SimpleMonitor:
+    """Collects system and bot-process statistics"""
+
+    BOT_SCRIPTS = ('run.py', 'telegram_bot.py', 'mailserver_email_bot.py')
+
+    def __init__(self):
+        # Prime the sliding-window counters: the first interval=None call
+        # returns 0.0, every later call measures since the previous one
+        psutil.cpu_percent(interval=None)
+
+        self._processes = {}
+        for proc in self._find_bot_processes():
+            try:
+                proc.cpu_percent(interval=None)
+                self._processes[proc.pid] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        # Cache NVML device handles once; queries per sample are then
+        # in-process driver calls instead of a nvidia-smi fork
+        self._gpu_handles = []
+        if PYNVML_AVAILABLE:
+            try:
+                pynvml.nvmlInit()
+                self._gpu_handles = [
+                    pynvml.nvmlDeviceGetHandleByIndex(i)
+                    for i in range(pynvml.nvmlDeviceGetCount())
+                ]
+            except pynvml.NVMLError:
+                self._gpu_handles = []
+
+    def _find_bot_processes(self):
+        """Find running bot processes by script name"""
+        found = []
+        for proc in psutil.process_iter(['cmdline']):
+            try:
+                cmdline = ' '.join(proc.info['cmdline'] or [])
+                if any(script in cmdline for script in self.BOT_SCRIPTS):
+                    found.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return found
+
+    def get_gpu_stats(self):
+        """GPU statistics via NVML, falling back to nvidia-smi; empty when no GPU"""
+        if self._gpu_handles:
+            try:
+                stats = []
+                for handle in self._gpu_handles:
+                    mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                    util = pynvml.nvmlDeviceGetUtilizationRates(handle)
+                    temp = pynvml.nvmlDeviceGetTemperature(
+                        handle, pynvml.NVML_TEMPERATURE_GPU
+                    )
+                    stats.append({
+                        'memory_used_mb': mem.used // (1024 ** 2),
+                        'memory_total_mb': mem.total // (1024 ** 2),
+                        'utilization': util.gpu,
+                        'temperature': temp
+                    })
+                return stats
+            except pynvml.NVMLError:
+                pass
+
+        try:
+            result = subprocess.run(
+                ['nvidia-smi',
+                 '--query-gpu=memory.used,memory.total,utilization.gpu,temperature.gpu',
+                 '--format=csv,noheader,nounits'],
+                capture_output=True, text=True, timeout=5
+            )
+            if result.returncode != 0:
+                return []
+            stats = []
+            for line in result.stdout.strip().splitlines():
+                used, total, util, temp = (value.strip() for value in line.split(','))
+                stats.append({
+                    'memory_used_mb': int(used),
+                    'memory_total_mb': int(total),
+                    'utilization': int(util),
+                    'temperature': int(temp)
+                })
+            return stats
+        except (FileNotFoundError, subprocess.TimeoutExpired, ValueError):
+            return []
+
+    def get_system_stats(self, blocking=False):
+        """Take one sample of system and bot-process stats
+
+        The sliding-window CPU counters only measure since the previous
+        read, so a one-shot snapshot (no loop interval to supply the
+        window) passes blocking=True to wait a short window out first;
+        without it the numbers would be a meaningless ~0.0%.
+        """
+        if blocking:
+            time.sleep(0.1)
+
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+
+        stats = {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'memory_used_gb': memory.used / (1024 ** 3),
+            'memory_total_gb': memory.total / (1024 ** 3),
+            'disk_percent': disk.percent,
+            'gpu': self.get_gpu_stats(),
+            'processes': []
+        }
+
+        for pid, proc in list(self._processes.items()):
+            try:
+                stats['processes'].append({
+                    'pid': pid,
+                    'cpu_percent': proc.cpu_percent(interval=None),
+                    'memory_mb': proc.memory_info().rss / (1024 ** 2)
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                del self._processes[pid]
+
+        return stats
+
+    def print_stats(self, stats):
+        """Print one sample in a compact human-readable form"""
+        print(f"🖥️ CPU: {stats['cpu_percent']:.1f}% | "
+              f"💾 RAM: {stats['memory_percent']:.1f}% "
+              f"({stats['memory_used_gb']:.1f}/{stats['memory_total_gb']:.1f} GB) | "
+              f"💿 Disk: {stats['disk_percent']:.1f}%")
+
+        for gpu in stats['gpu']:
+            print(f"🎮 GPU: {gpu['memory_used_mb']}/{gpu['memory_total_mb']} MiB | "
+                  f"{gpu['utilization']}% | {gpu['temperature']}°C")
+
+        for proc in stats['processes']:
+            print(f"🤖 Bot pid {proc['pid']}: CPU {proc['cpu_percent']:.1f}% | "
+                  f"RAM {proc['memory_mb']:.0f} MB")
+
+    def monitor_continuous(self, interval):
+        """Print samples every `interval` seconds until interrupted"""
+        print(f"📊 Monitoring every {interval}s (Ctrl+C to stop)")
+        try:
+            while True:
+                self.print_stats(self.get_system_stats())
+                print('-' * 40)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n👋 Monitoring stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description='Code du Travail AI Bots monitor')
+    parser.add_argument('--continuous', action='store_true',
+                        help='Keep sampling instead of printing one snapshot')
+    parser.add_argument('-i', '--interval', type=int, default=5,
+                        help='Sampling interval in seconds (default: 5)')
+    args = parser.parse_args()
+
+    monitor = SimpleMonitor()
+
+    if args.continuous:
+        monitor.monitor_continuous(args.interval)
+    else:
+        monitor.print_stats(monitor.get_system_stats(blocking=True))
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,6 @@ import sys
 import os
 import argparse
 import threading
-import time
 import signal
 import asyncio
 from pathlib import Path
@@ -77,24 +76,30 @@ def setup_directories():
         print("📝 Continuing with basic setup")
 
 def check_dependencies():
-    """Check if required dependencies are installed"""
+    """Check if required dependencies are installed
+
+    Version strings come from package metadata, so checking costs
+    milliseconds instead of importing torch/transformers (seconds plus
+    CUDA driver init). Only the CUDA probe actually imports torch, and
+    SKIP_CUDA_CHECK=1 skips even that.
+    """
+    from importlib import metadata
+
     try:
+        print(f"✅ PyTorch: {metadata.version('torch')}")
+        print(f"✅ Transformers: {metadata.version('transformers')}")
+        print(f"✅ Python-telegram-bot: {metadata.version('python-telegram-bot')}")
+    except metadata.PackageNotFoundError as e:
+        print(f"❌ Missing dependency: {e}")
+        print("Please install requirements: pip install -r requirements.txt")
+        sys.exit(1)
+
+    if os.getenv('SKIP_CUDA_CHECK') != '1':
         import torch
-        import transformers
-        import telegram
-        print(f"✅ PyTorch: {torch.__version__}")
-        print(f"✅ Transformers: {transformers.__version__}")
-        print(f"✅ Python-telegram-bot: {telegram.__version__}")
-        
         if torch.cuda.is_available():
             print(f"✅ CUDA available: {torch.cuda.get_device_name(0)}")
         else:
             print("⚠️ CUDA not available, using CPU")
-            
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
-        print("Please install requirements: pip install -r requirements.txt")
-        sys.exit(1)
 
 def run_telegram_bot():
     """Run the Telegram bot with proper asyncio setup"""
@@ -133,42 +138,25 @@ def run_email_bot():
         raise
 
 def run_both_bots():
-    """Run both bots simultaneously"""
+    """Run both bots simultaneously
+
+    The Telegram bot owns the main thread's event loop directly; only the
+    email bot needs a worker thread. That removes the extra loop-in-a-thread
+    and the old 1 Hz liveness-polling loop that kept the main thread awake.
+    """
     print("🚀 Starting both Telegram and Email bots...")
-    
-    # Create threads for both bots
-    telegram_thread = threading.Thread(target=run_telegram_bot, name="TelegramBot")
-    email_thread = threading.Thread(target=run_email_bot, name="EmailBot")
-    
-    # Set threads as daemon so they stop when main program stops
-    telegram_thread.daemon = True
-    email_thread.daemon = True
-    
-    # Start both threads
-    telegram_thread.start()
-    print("✅ Telegram bot started")
-    
-    # Wait a bit before starting email bot
-    time.sleep(2)
-    
+
+    email_thread = threading.Thread(target=run_email_bot, name="EmailBot", daemon=True)
     email_thread.start()
     print("✅ Email bot started")
-    
+
     try:
-        # Keep main thread alive
-        while True:
-            if not telegram_thread.is_alive():
-                print("⚠️ Telegram bot thread stopped")
-                break
-            if not email_thread.is_alive():
-                print("⚠️ Email bot thread stopped")
-                break
-            time.sleep(1)
+        # Blocks until the Telegram bot exits; the daemon email thread is
+        # torn down with the process
+        run_telegram_bot()
     except KeyboardInterrupt:
         print("\n👋 Stopping both bots...")
-    
-    # Wait for threads to finish
-    telegram_thread.join(timeout=5)
+
     email_thread.join(timeout=5)
 
 def check_health():
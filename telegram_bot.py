@@ -9,9 +9,16 @@ questions about French labor law (Code du Travail).
 import os
 import logging
 import asyncio
+import contextlib
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
 from typing import Optional
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+from transformers import (AutoModelForCausalLM, LlamaTokenizerFast,
+                          TextIteratorStreamer)
 from peft import PeftModel, PeftConfig
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
@@ -26,9 +33,44 @@ try:
 except ImportError:
     IPEX_AVAILABLE = False
 
+# FlashAttention-2 fused kernels (CUDA, fp16/bf16 only)
+try:
+    import flash_attn  # noqa: F401
+    FLASH_ATTN_AVAILABLE = True
+except ImportError:
+    FLASH_ATTN_AVAILABLE = False
+
+# Optional vLLM backend (PagedAttention, continuous batching): concurrent
+# Telegram users share one paged KV pool instead of serializing generate calls
+try:
+    from vllm import LLM, SamplingParams
+    from vllm.lora.request import LoRARequest
+    VLLM_AVAILABLE = True
+except ImportError:
+    VLLM_AVAILABLE = False
+
+# Optional OpenVINO backend: an AOT-compiled graph with fused attention and
+# INT4/INT8 weight-only kernels replaces the eager PyTorch scheduler on CPU
+try:
+    from optimum.intel.openvino import OVModelForCausalLM
+    OPENVINO_AVAILABLE = True
+except ImportError:
+    OPENVINO_AVAILABLE = False
+
+# Optional llama.cpp backend: Q4_K_M GGUF with hand-written AVX-512 kernels,
+# the reference CPU implementation for quantized decode
+try:
+    from llama_cpp import Llama
+    LLAMACPP_AVAILABLE = True
+except ImportError:
+    LLAMACPP_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
+# Bytes per gigabyte, for the /status report
+GB = 1 << 30
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -44,6 +86,10 @@ class MistralTelegramBot:
     def __init__(self):
         self.model = None
         self.tokenizer = None
+        self.llm = None  # vLLM engine when INFERENCE_BACKEND=vllm
+        self.llama = None  # llama.cpp engine when INFERENCE_BACKEND=gguf
+        self._lora_request = None
+        self.inference_backend = os.getenv('INFERENCE_BACKEND', 'transformers').lower()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model_name = "Pyzeur/Code-du-Travail-mistral-finetune"
         self.base_model_name = "mistralai/Mistral-7B-Instruct-v0.3"
@@ -58,6 +104,53 @@ class MistralTelegramBot:
             torch.backends.mkldnn.enabled = True
             logger.info(f"CPU optimization enabled: {os.cpu_count()} threads, IPEX: {IPEX_AVAILABLE}")
         
+        # Dynamic batching: prompts from concurrent chats arriving within a
+        # short window are grouped into a single generate call
+        self.max_batch_size = int(os.getenv('TELEGRAM_MAX_BATCH_SIZE', '8'))
+        self.batch_window = float(os.getenv('TELEGRAM_BATCH_WINDOW', '0.025'))
+        self._request_queue = queue.Queue()
+        self._generation_thread = None
+
+        # Greedy decoding by default: for legal Q&A determinism is a
+        # feature, and skipping the per-token top-k sort + multinomial over
+        # the 32k vocab saves work on CPU. /creative re-enables sampling.
+        self.use_sampling = os.getenv('TELEGRAM_SAMPLING', 'false').lower() == 'true'
+
+        # Hard cap on question length: prefill FLOPs are quadratic in
+        # prompt tokens, so one pasted contract must not hijack the worker
+        # for every other chat. Questions are usually <200 tokens; the tail
+        # is kept because the actual ask follows whatever was pasted.
+        self.max_prompt_tokens = int(os.getenv('TELEGRAM_MAX_PROMPT_TOKENS', '512'))
+
+        # Stream tokens into an edited Telegram message as they are
+        # generated: same FLOPs, but the first words appear in well under a
+        # second instead of after the full decode
+        self.stream_responses = os.getenv('TELEGRAM_STREAMING', 'true').lower() == 'true'
+
+        # Static KV cache: a pre-allocated fixed-size cache means no
+        # growing allocations per token and, combined with torch.compile's
+        # reduce-overhead mode on CUDA, a decode step captured as one
+        # replayable CUDA graph
+        self.use_static_cache = os.getenv('STATIC_CACHE', 'false').lower() == 'true'
+
+        # Per-chat KV cache: follow-up questions in the same chat reuse the
+        # conversation's past_key_values, so prefill only covers the new
+        # turn instead of the whole history. LRU-bounded; worker-thread only.
+        self.use_chat_kv_cache = os.getenv('TELEGRAM_KV_CACHE', 'true').lower() == 'true'
+        self.chat_kv_cache_size = int(os.getenv('TELEGRAM_KV_CACHE_CHATS', '100'))
+        self._chat_kv = OrderedDict()
+
+        # Tokenized once at load: the [INST] wrapper never changes, so per
+        # message only the question itself goes through the tokenizer
+        self._pre_ids = None
+        self._post_ids = None
+
+        # Prime psutil's sliding-window CPU counter: the first
+        # interval=None call returns 0.0, later calls measure since the
+        # previous one without sleeping
+        psutil.cpu_percent(interval=None)
+        self._system_info_cache = (0.0, '')
+
         # Get environment variables
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         if not self.telegram_token:
@@ -67,70 +160,210 @@ class MistralTelegramBot:
         
     async def load_model(self):
         """Load the fine-tuned LoRA model and tokenizer with CPU optimizations"""
-        if self.model is not None:
+        if self.model is not None or self.llm is not None or self.llama is not None:
             return
-            
+
         self.is_loading = True
         logger.info("Loading LoRA model and tokenizer with CPU optimizations...")
-        
+
         try:
             # Get authentication token if available
             use_auth_token = os.getenv('HUGGING_FACE_TOKEN')
             if use_auth_token:
                 logger.info("Using HuggingFace authentication token")
-            
-            # NO quantization on CPU (it slows down)
-            quantization_config = None
-            
+
+            # vLLM backend: paged KV cache and continuous batching across
+            # concurrent chats replace the per-request generate calls
+            if self.inference_backend == 'vllm':
+                if VLLM_AVAILABLE:
+                    logger.info(f"Loading {self.base_model_name} with vLLM (PagedAttention)...")
+                    self.llm = LLM(
+                        model=self.base_model_name,
+                        enable_lora=True,
+                        max_lora_rank=16,
+                        max_model_len=self.max_length,
+                        enable_prefix_caching=True
+                    )
+                    self._lora_request = LoRARequest('code-du-travail', 1, self.model_name)
+                    logger.info("vLLM engine loaded successfully!")
+                    return
+                logger.warning("INFERENCE_BACKEND=vllm but vllm is not installed, "
+                               "falling back to transformers")
+
+            # llama.cpp backend: runs a pre-quantized GGUF file (convert once
+            # with convert_hf_to_gguf.py, then llama-quantize to Q4_K_M) and
+            # brings its own tokenizer, so the HF stack stays unloaded
+            if self.inference_backend == 'gguf':
+                if LLAMACPP_AVAILABLE:
+                    gguf_path = os.getenv('GGUF_MODEL_PATH', 'mistral.Q4_K_M.gguf')
+                    logger.info(f"Loading GGUF model from {gguf_path} with llama.cpp...")
+                    self.llama = Llama(
+                        model_path=gguf_path,
+                        n_ctx=self.max_length,
+                        n_threads=os.cpu_count(),
+                        n_batch=512,
+                        verbose=False
+                    )
+                    logger.info("llama.cpp model loaded successfully!")
+                    return
+                logger.warning("INFERENCE_BACKEND=gguf but llama-cpp-python is "
+                               "not installed, falling back to transformers")
+
             # Load tokenizer
             logger.info(f"Loading tokenizer from {self.base_model_name}...")
-            self.tokenizer = AutoTokenizer.from_pretrained(
+            # Mistral ships a LlamaTokenizerFast; loading the concrete class
+            # skips the AutoTokenizer resolution step and needs no
+            # trust_remote_code since there is no custom Python tokenizer
+            # (set TRANSFORMERS_OFFLINE=1 after the first run to serve it
+            # straight from the HF cache)
+            self.tokenizer = LlamaTokenizerFast.from_pretrained(
                 self.base_model_name,
-                trust_remote_code=True,
                 token=use_auth_token
             )
-            
+
             # Add pad token if it doesn't exist
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
-            
-            # Load base model with CPU optimizations
-            logger.info(f"Loading base model {self.base_model_name} with CPU optimizations...")
-            base_model = AutoModelForCausalLM.from_pretrained(
-                self.base_model_name,
-                torch_dtype=torch.float32,  # Use float32 for CPU
-                trust_remote_code=True,
-                token=use_auth_token,
-                low_cpu_mem_usage=True,  # Optimize memory usage
-                use_cache=True  # Enable KV cache for faster inference
-            )
-            
-            # Move to CPU
-            base_model = base_model.to(self.device)
-            
+            # Left padding so batched generation slices completions uniformly
+            self.tokenizer.padding_side = 'left'
+            # When truncating, drop the head: the recent tokens hold the ask
+            self.tokenizer.truncation_side = 'left'
+
+            # Cache the constant prompt wrapper token ids as plain lists;
+            # _encode_prompt concatenates them around the question and
+            # allocates the tensor straight on the target device
+            self._pre_ids = self.tokenizer(
+                "<s>[INST] ", add_special_tokens=False
+            ).input_ids
+            self._post_ids = self.tokenizer(
+                " [/INST]", add_special_tokens=False
+            ).input_ids
+
+            # OpenVINO backend: keeps the tokenizer and .generate() API but
+            # runs a pre-exported model (LoRA merged with merge_and_unload,
+            # then `optimum-cli export openvino --weight-format int4`)
+            if self.inference_backend == 'openvino':
+                if OPENVINO_AVAILABLE:
+                    ov_model_dir = os.getenv('OV_MODEL_DIR', 'mistral_ov')
+                    logger.info(f"Loading OpenVINO model from {ov_model_dir}...")
+                    self.model = OVModelForCausalLM.from_pretrained(
+                        ov_model_dir,
+                        ov_config={'PERFORMANCE_HINT': 'LATENCY'}
+                    )
+                    # The OV runtime manages KV state internally; the per-chat
+                    # past_key_values handoff is a PyTorch-side contract
+                    self.use_chat_kv_cache = False
+                    logger.info("OpenVINO model loaded successfully!")
+                    self._start_generation_worker()
+                    return
+                logger.warning("INFERENCE_BACKEND=openvino but optimum-intel is "
+                               "not installed, falling back to transformers")
+
+            # Half precision on GPU: single-stream decode is memory-bound,
+            # so fp16/bf16 beats both fp32 and emulated 4-bit dequant at
+            # batch 1. NO quantization on CPU either (it slows down).
+            model_kwargs = {
+                'trust_remote_code': True,
+                'token': use_auth_token,
+                'low_cpu_mem_usage': True,  # Optimize memory usage
+                'use_cache': True  # Enable KV cache for faster inference
+            }
+            if self.device == 'cuda':
+                model_kwargs['torch_dtype'] = (
+                    torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+                )
+                model_kwargs['device_map'] = {'': self.device}
+            else:
+                # bf16 + IPEX unlocks AMX/AVX-512 BF16 tile matmuls and
+                # halves weight bandwidth; plain eager CPU stays fp32
+                model_kwargs['torch_dtype'] = (
+                    torch.bfloat16 if IPEX_AVAILABLE else torch.float32
+                )
+
+            if self.device == 'cuda' and FLASH_ATTN_AVAILABLE:
+                # Fused attention kernel: same FLOPs, far less HBM traffic
+                # on Mistral's sliding-window attention (needs fp16/bf16,
+                # which the CUDA branch above guarantees)
+                logger.info("Using FlashAttention-2 attention implementation")
+                model_kwargs['attn_implementation'] = 'flash_attention_2'
+            else:
+                # PyTorch's built-in fused SDPA wherever FlashAttention-2
+                # is unavailable — still beats the eager attention path
+                model_kwargs['attn_implementation'] = 'sdpa'
+
+            merged_dir = os.getenv('MERGED_MODEL_DIR', '')
+            if merged_dir and Path(merged_dir).exists():
+                # A previously saved merged checkpoint skips PEFT entirely
+                logger.info(f"Loading pre-merged model from {merged_dir}...")
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    merged_dir,
+                    **model_kwargs
+                )
+                if 'device_map' not in model_kwargs:
+                    self.model = self.model.to(self.device)
+            else:
+                # Load base model
+                logger.info(f"Loading base model {self.base_model_name}...")
+                base_model = AutoModelForCausalLM.from_pretrained(
+                    self.base_model_name,
+                    **model_kwargs
+                )
+
+                if 'device_map' not in model_kwargs:
+                    base_model = base_model.to(self.device)
+
+                # Load LoRA adapter
+                logger.info(f"Loading LoRA adapter from {self.model_name}...")
+                self.model = PeftModel.from_pretrained(
+                    base_model,
+                    self.model_name,
+                    token=use_auth_token
+                )
+
+                if os.getenv('MERGE_LORA', 'true').lower() == 'true':
+                    # Fold W + BA into the base weights once: one fewer
+                    # matmul per projection per token, no PEFT forward
+                    # hooks, and a simpler graph for torch.compile
+                    logger.info("Merging LoRA adapter into base weights...")
+                    self.model = self.model.merge_and_unload()
+
+                    if merged_dir:
+                        logger.info(f"Saving merged checkpoint to {merged_dir}...")
+                        self.model.save_pretrained(merged_dir)
+                        self.tokenizer.save_pretrained(merged_dir)
+
+            # Set to evaluation mode for inference, with gradient tracking
+            # off at the parameter level so no call path can build
+            # autograd state (generate itself runs under inference_mode)
+            self.model.eval()
+            self.model.requires_grad_(False)
+
             # Apply IPEX optimizations if available
             if IPEX_AVAILABLE and self.device == "cpu":
-                logger.info("Applying Intel Extension for PyTorch optimizations...")
-                base_model = ipex.optimize(base_model)
-            
-            # Load LoRA adapter
-            logger.info(f"Loading LoRA adapter from {self.model_name}...")
-            self.model = PeftModel.from_pretrained(
-                base_model,
-                self.model_name,
-                token=use_auth_token
-            )
-            
-            # Set to evaluation mode for inference
-            self.model.eval()
-            
+                logger.info("Applying Intel Extension for PyTorch optimizations (bf16)...")
+                self.model = ipex.optimize(self.model, dtype=torch.bfloat16,
+                                           inplace=True, weights_prepack=True)
+
+            if self.use_static_cache:
+                try:
+                    self.model.generation_config.cache_implementation = 'static'
+                    self.model.generation_config.max_length = self.max_length
+                    # Handing past_key_values between turns and a static
+                    # cache are mutually exclusive
+                    self.use_chat_kv_cache = False
+                    logger.info(f"Using static KV cache (max_length={self.max_length})")
+                except Exception as cache_error:
+                    logger.warning(f"Static KV cache not applied: {cache_error}")
+                    self.use_static_cache = False
+
+            self._compile_model()
+
             # Enable inference mode optimizations
-            with torch.inference_mode():
+            with torch.inference_mode(), self._autocast():
                 # Warm up the model with a dummy input
                 logger.info("Warming up model...")
                 dummy_input = self.tokenizer("Test", return_tensors="pt", max_length=50)
-                with torch.no_grad():
-                    _ = self.model.generate(**dummy_input, max_new_tokens=10, do_sample=False)
+                _ = self.model.generate(**dummy_input, max_new_tokens=10, do_sample=False)
             
             logger.info("LoRA model loaded and optimized successfully!")
             
@@ -141,99 +374,347 @@ class MistralTelegramBot:
             try:
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.base_model_name,
-                    torch_dtype=torch.float32,
-                    trust_remote_code=True,
-                    token=use_auth_token,
-                    low_cpu_mem_usage=True,
-                    use_cache=True
+                    **model_kwargs
                 )
-                self.model = self.model.to(self.device)
+                if 'device_map' not in model_kwargs:
+                    self.model = self.model.to(self.device)
                 
                 if IPEX_AVAILABLE and self.device == "cpu":
-                    self.model = ipex.optimize(self.model)
+                    self.model = ipex.optimize(self.model, dtype=torch.bfloat16,
+                                               inplace=True, weights_prepack=True)
                 
                 self.model.eval()
+                self.model.requires_grad_(False)
+                self._compile_model()
                 logger.info("Base model loaded and optimized successfully (without fine-tuning)")
             except Exception as fallback_error:
                 logger.error(f"Error loading fallback model: {fallback_error}")
                 raise
         finally:
             self.is_loading = False
+
+        # Start the batching worker now that a model is ready
+        self._start_generation_worker()
     
-    def generate_response(self, question: str) -> str:
+    def _compile_model(self):
+        """JIT-compile the decode step to cut per-token dispatch overhead
+
+        Compiling forward rather than the module keeps generate() and the
+        config attributes intact on the wrapper; dynamic=True avoids a
+        recompile per prompt length. reduce-overhead adds CUDA graph
+        capture on GPU; max-autotune lets inductor tune GEMM templates on
+        CPU. The warmup call right after load absorbs the compile cost.
+        """
+        if os.getenv('COMPILE', 'true').lower() != 'true' or not hasattr(torch, 'compile'):
+            return
+        mode = 'reduce-overhead' if self.device == 'cuda' else 'max-autotune'
+        try:
+            self.model.forward = torch.compile(self.model.forward, mode=mode,
+                                               fullgraph=False, dynamic=True)
+            logger.info(f"Model forward compiled with torch.compile ({mode})")
+        except Exception as e:
+            logger.warning(f"torch.compile not applied: {e}")
+
+    def generate_response(self, question: str, chat_id: Optional[int] = None) -> str:
         """Generate response using the fine-tuned model with CPU optimizations"""
-        if self.model is None or self.tokenizer is None:
+        if (self.llm is None and self.llama is None
+                and (self.model is None or self.tokenizer is None)):
             return "❌ Le modèle n'est pas encore chargé. Veuillez patienter..."
-        
+
         try:
-            # Format the prompt for Mistral v0.3
-            prompt = f"<s>[INST] {question} [/INST]"
-            
-            # Tokenize input with optimized settings
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                truncation=True,
-                max_length=self.max_length // 2,
-                padding=False  # No padding needed for single input
-            ).to(self.device)
-            
-            # CPU-optimized generation parameters
-            generation_config = {
-                "max_new_tokens": 256,  # Reduced for faster generation
+            if self.llm is not None:
+                # Format the prompt for Mistral v0.3
+                prompt = f"<s>[INST] {question} [/INST]"
+                sampling_params = SamplingParams(
+                    temperature=0.7 if self.use_sampling else 0.0,
+                    top_p=0.9,
+                    top_k=40,
+                    repetition_penalty=1.1,
+                    max_tokens=256
+                )
+                output = self.llm.generate([prompt], sampling_params,
+                                           lora_request=self._lora_request)[0]
+                response = output.outputs[0].text.strip()
+                if not response:
+                    response = "Je n'ai pas pu générer une réponse appropriée à votre question."
+                return response
+
+            if self.llama is not None:
+                prompt = f"<s>[INST] {question} [/INST]"
+                output = self.llama(
+                    prompt,
+                    max_tokens=256,
+                    temperature=0.7 if self.use_sampling else 0.0,
+                    repeat_penalty=1.1,
+                    stop=["</s>"]
+                )
+                response = output['choices'][0]['text'].strip()
+                if not response:
+                    response = "Je n'ai pas pu générer une réponse appropriée à votre question."
+                return response
+
+            # Enqueue for the batching worker and wait for the result
+            future = Future()
+            self._request_queue.put((question, chat_id, future, None))
+            return future.result()
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return f"❌ Erreur lors de la génération de la réponse: {str(e)}"
+
+    def _start_generation_worker(self):
+        """Start the background thread that batches generation requests"""
+        if self._generation_thread is None or not self._generation_thread.is_alive():
+            self._generation_thread = threading.Thread(
+                target=self._generation_worker,
+                name='GenerationWorker',
+                daemon=True
+            )
+            self._generation_thread.start()
+
+    def _generation_worker(self):
+        """Pull queued prompts, group them within a short window, generate once"""
+        while True:
+            batch = [self._request_queue.get()]
+
+            # Collect more requests arriving within the batching window
+            deadline = time.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._request_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Streaming requests run one by one so their tokens reach the
+            # right consumer; the rest are answered as a single batch
+            streaming = [item for item in batch if item[3] is not None]
+            plain = [item for item in batch if item[3] is None]
+
+            for question, chat_id, future, streamer in streaming:
+                try:
+                    if self.use_chat_kv_cache and chat_id is not None:
+                        response = self._generate_with_chat_kv(question, chat_id,
+                                                               streamer=streamer)
+                    else:
+                        response = self._generate_streaming(question, streamer)
+                    future.set_result(response)
+                except Exception as e:
+                    logger.error(f"Error in streaming generation: {e}")
+                    streamer.end()  # unblock the consumer
+                    future.set_exception(e)
+
+            if not plain:
+                continue
+            try:
+                if (len(plain) == 1 and self.use_chat_kv_cache
+                        and plain[0][1] is not None):
+                    responses = [self._generate_with_chat_kv(plain[0][0], plain[0][1])]
+                else:
+                    responses = self._generate_batch([prompt for prompt, _, _, _ in plain])
+                for (_, _, future, _), response in zip(plain, responses):
+                    future.set_result(response)
+            except Exception as e:
+                logger.error(f"Error in generation worker: {e}")
+                for _, _, future, _ in plain:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _build_generation_config(self) -> dict:
+        """Generation parameters: deterministic greedy unless /creative is on"""
+        config = {
+            "max_new_tokens": 256,  # Reduced for faster generation
+            "repetition_penalty": 1.1,
+            "pad_token_id": self.tokenizer.eos_token_id,
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "use_cache": True,  # Important for CPU
+            "num_beams": 1  # Greedy search is faster on CPU
+        }
+        if self.use_sampling:
+            config.update({
                 "do_sample": True,
                 "temperature": 0.7,
                 "top_p": 0.9,
-                "top_k": 40,  # Reduced from 50
-                "repetition_penalty": 1.1,
-                "pad_token_id": self.tokenizer.eos_token_id,
-                "eos_token_id": self.tokenizer.eos_token_id,
-                "use_cache": True,  # Important for CPU
-                "num_beams": 1  # Greedy search is faster on CPU
-            }
-            
-            # Generate response with optimizations
-            with torch.inference_mode():  # Faster than no_grad for inference
-                outputs = self.model.generate(
-                    **inputs,
-                    **generation_config
-                )
-            
-            # Decode response
-            response = self.tokenizer.decode(
-                outputs[0][inputs.input_ids.shape[1]:],
-                skip_special_tokens=True
-            ).strip()
-            
-            # Clean up response
+                "top_k": 40  # Reduced from 50
+            })
+        else:
+            config["do_sample"] = False
+        return config
+
+    def _autocast(self):
+        """bf16 autocast on the IPEX CPU path, a no-op everywhere else"""
+        if IPEX_AVAILABLE and self.device == 'cpu':
+            return torch.cpu.amp.autocast(dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def _encode_prompt(self, question: str) -> torch.Tensor:
+        """Build prompt ids from the cached wrapper tokens and the question
+
+        Only the question passes through the tokenizer, and only as a
+        Python list: the constant <s>[INST] ... [/INST] wrapper ids are
+        concatenated around it and the tensor is allocated directly on
+        the target device, so one allocation replaces the old
+        tokenize-to-CPU-tensor + cat + host-to-device copy per request.
+        """
+        question_ids = self.tokenizer(question, add_special_tokens=False).input_ids
+        if len(question_ids) > self.max_prompt_tokens:
+            logger.warning(f"Truncated prompt from {len(question_ids)} to "
+                           f"{self.max_prompt_tokens} tokens")
+            question_ids = question_ids[-self.max_prompt_tokens:]
+        ids = self._pre_ids + question_ids + self._post_ids
+        logger.debug(f"Prompt length: {len(ids)} tokens")
+        return torch.tensor([ids], dtype=torch.long, device=self.device)
+
+    def _generate_streaming(self, question: str, streamer) -> str:
+        """Generate one response, pushing decoded text through `streamer`"""
+        input_ids = self._encode_prompt(question)
+
+        with torch.inference_mode(), self._autocast():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                streamer=streamer,
+                **self._build_generation_config()
+            )
+
+        response = self.tokenizer.batch_decode(
+            outputs[:, input_ids.shape[1]:],
+            skip_special_tokens=True
+        )[0].strip()
+        if not response:
+            response = "Je n'ai pas pu générer une réponse appropriée à votre question."
+        return response
+
+    def _generate_with_chat_kv(self, question: str, chat_id: int,
+                               streamer=None) -> str:
+        """Generate a single response, reusing the chat's cached KV state
+
+        The conversation's token ids and past_key_values from the previous
+        turn are kept per chat, so this turn's prefill only covers the new
+        question instead of the full history.
+        """
+        prompt_ids = self._encode_prompt(question)
+
+        cached = self._chat_kv.get(chat_id)
+        past_key_values = None
+        if cached is not None:
+            cached_ids, past_key_values = cached
+            input_ids = torch.cat([cached_ids, prompt_ids], dim=1)
+            # Conversation outgrew the context window: start this chat over
+            if input_ids.shape[1] + 256 > self.max_length:
+                self._chat_kv.pop(chat_id, None)
+                past_key_values = None
+                input_ids = prompt_ids
+        else:
+            input_ids = prompt_ids
+
+        generate_kwargs = {
+            'input_ids': input_ids,
+            'attention_mask': torch.ones_like(input_ids),
+            'return_dict_in_generate': True,
+            **self._build_generation_config()
+        }
+        if past_key_values is not None:
+            generate_kwargs['past_key_values'] = past_key_values
+        if streamer is not None:
+            generate_kwargs['streamer'] = streamer
+
+        with torch.inference_mode(), self._autocast():
+            outputs = self.model.generate(**generate_kwargs)
+
+        response = self.tokenizer.batch_decode(
+            outputs.sequences[:, input_ids.shape[1]:],
+            skip_special_tokens=True
+        )[0].strip()
+
+        # Remember this turn's state for the next question in the chat
+        new_past = getattr(outputs, 'past_key_values', None)
+        if new_past is not None:
+            self._chat_kv[chat_id] = (outputs.sequences, new_past)
+            self._chat_kv.move_to_end(chat_id)
+            while len(self._chat_kv) > self.chat_kv_cache_size:
+                self._chat_kv.popitem(last=False)
+        else:
+            self._chat_kv.pop(chat_id, None)
+
+        if not response:
+            response = "Je n'ai pas pu générer une réponse appropriée à votre question."
+        return response
+
+    def _generate_batch(self, questions: list) -> list:
+        """Run one or several questions through a single generate call"""
+        if len(questions) == 1:
+            # Single request: reuse the cached wrapper ids, no padding
+            input_ids = self._encode_prompt(questions[0])
+            inputs = {'input_ids': input_ids,
+                      'attention_mask': torch.ones_like(input_ids)}
+        else:
+            # Tokenize with left padding so completions start at the same offset
+            inputs = dict(self.tokenizer(
+                [f"<s>[INST] {question} [/INST]" for question in questions],
+                return_tensors="pt",
+                truncation=True,
+                max_length=self.max_prompt_tokens,
+                padding=True,
+                add_special_tokens=False
+            ).to(self.device))
+
+        generation_config = self._build_generation_config()
+
+        # Generate response with optimizations
+        with torch.inference_mode(), self._autocast():  # Faster than no_grad for inference
+            outputs = self.model.generate(
+                **inputs,
+                **generation_config
+            )
+
+        # Slice off the (padded) prompt and decode all completions at once
+        prompt_length = inputs['input_ids'].shape[1]
+        decoded = self.tokenizer.batch_decode(
+            outputs[:, prompt_length:],
+            skip_special_tokens=True
+        )
+
+        responses = []
+        for response in decoded:
+            response = response.strip()
             if not response:
                 response = "Je n'ai pas pu générer une réponse appropriée à votre question."
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return f"❌ Erreur lors de la génération de la réponse: {str(e)}"
-    
+            responses.append(response)
+
+        return responses
+
     def get_system_info(self) -> str:
-        """Get system information"""
+        """Get system information
+
+        Uses psutil's non-blocking sliding-window CPU sampling (primed in
+        __init__) instead of a one-second sleep, and caches the rendered
+        text for two seconds so a spammed /status costs one set of
+        syscalls, not one per invocation.
+        """
+        cached_at, cached_info = self._system_info_cache
+        if cached_info and time.monotonic() - cached_at < 2:
+            return cached_info
+
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
             info = f"📊 **Informations système:**\n\n"
             info += f"🖥️ CPU: {cpu_percent}% ({os.cpu_count()} threads)\n"
-            info += f"💾 RAM: {memory.percent}% ({memory.used // (1024**3)}GB / {memory.total // (1024**3)}GB)\n"
-            info += f"💿 Disque: {disk.percent}% ({disk.used // (1024**3)}GB / {disk.total // (1024**3)}GB)\n"
+            info += f"💾 RAM: {memory.percent}% ({memory.used // GB}GB / {memory.total // GB}GB)\n"
+            info += f"💿 Disque: {disk.percent}% ({disk.used // GB}GB / {disk.total // GB}GB)\n"
             info += f"🔧 Device: {self.device.upper()}\n"
             
             if IPEX_AVAILABLE and self.device == "cpu":
                 info += f"⚡ IPEX: Activé\n"
             
             if torch.cuda.is_available():
-                gpu_memory = torch.cuda.get_device_properties(0).total_memory // (1024**3)
-                gpu_used = torch.cuda.memory_allocated(0) // (1024**3)
+                gpu_memory = torch.cuda.get_device_properties(0).total_memory // GB
+                gpu_used = torch.cuda.memory_allocated(0) // GB
                 info += f"🎮 GPU: {gpu_used}GB / {gpu_memory}GB\n"
             
             model_type = "Non chargé"
@@ -243,9 +724,10 @@ class MistralTelegramBot:
                 else:
                     model_type = "Base Model (v0.3, CPU Optimisé)"
             info += f"🤖 Modèle: {model_type}\n"
-            
+
+            self._system_info_cache = (time.monotonic(), info)
             return info
-            
+
         except Exception as e:
             return f"❌ Erreur lors de la récupération des informations système: {str(e)}"
 
@@ -267,12 +749,6 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
     
     await update.message.reply_text(welcome_message, parse_mode='Markdown')
-    
-    # Load model if not already loaded
-    if bot_instance.model is None and not bot_instance.is_loading:
-        await update.message.reply_text("🔄 Chargement du modèle optimisé en cours, veuillez patienter...")
-        await bot_instance.load_model()
-        await update.message.reply_text("✅ Modèle chargé et optimisé ! Vous pouvez maintenant poser vos questions.")
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /help is issued."""
@@ -296,9 +772,18 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
+async def creative(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Toggle between deterministic greedy decoding and sampling"""
+    bot_instance.use_sampling = not bot_instance.use_sampling
+    if bot_instance.use_sampling:
+        await update.message.reply_text("🎨 Mode créatif activé (échantillonnage)")
+    else:
+        await update.message.reply_text("📏 Mode déterministe activé (greedy)")
+
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show system status"""
-    status_info = bot_instance.get_system_info()
+    # Off the event loop: the stat syscalls are cheap but not free
+    status_info = await asyncio.to_thread(bot_instance.get_system_info)
     await update.message.reply_text(status_info, parse_mode='Markdown')
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -308,30 +793,26 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     username = update.effective_user.username or "Unknown"
     
     logger.info(f"Received message from {username} ({user_id}): {user_message[:100]}...")
-    
-    # Check if model is loading
-    if bot_instance.is_loading:
-        await update.message.reply_text(
-            "🔄 Le modèle est en cours de chargement, veuillez patienter quelques instants..."
-        )
-        return
-    
-    # Load model if not loaded
-    if bot_instance.model is None:
-        await update.message.reply_text("🔄 Chargement du modèle optimisé...")
-        try:
-            await bot_instance.load_model()
-            await update.message.reply_text("✅ Modèle chargé et optimisé !")
-        except Exception as e:
-            await update.message.reply_text(f"❌ Erreur lors du chargement du modèle: {str(e)}")
-            return
-    
+
     # Show typing indicator
     await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
-    
-    # Generate response
+
+    # Stream the answer into an edited message when the transformers
+    # backend is active; the engine backends answer in one piece
+    if (bot_instance.stream_responses and bot_instance.model is not None
+            and bot_instance.tokenizer is not None):
+        start_time = time.time()
+        await stream_response(update, user_message)
+        logger.info(f"Streamed response in {time.time() - start_time:.2f}s "
+                    f"for user {username}")
+        return
+
+    # Generate in a worker thread so the event loop keeps serving other
+    # chats; concurrent requests are coalesced by the batching worker
     start_time = time.time()
-    response = bot_instance.generate_response(user_message)
+    response = await asyncio.to_thread(
+        bot_instance.generate_response, user_message, update.effective_chat.id
+    )
     end_time = time.time()
     
     logger.info(f"Generated response in {end_time - start_time:.2f}s for user {username}")
@@ -345,12 +826,60 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             "❌ Désolé, une erreur s'est produite lors de l'envoi de la réponse."
         )
 
+async def stream_response(update: Update, question: str) -> None:
+    """Stream a response into one Telegram message, edited as tokens arrive
+
+    The generation itself still runs on the batching worker; this consumes
+    the streamer from the event loop and edits the placeholder message at
+    most twice a second to stay clear of Telegram's edit rate limit.
+    """
+    message = await update.message.reply_text("✍️ Rédaction de la réponse...")
+
+    streamer = TextIteratorStreamer(
+        bot_instance.tokenizer, skip_prompt=True, skip_special_tokens=True
+    )
+    future = Future()
+    bot_instance._request_queue.put(
+        (question, update.effective_chat.id, future, streamer)
+    )
+
+    buffer = ""
+    last_edit = time.time()
+    iterator = iter(streamer)
+    sentinel = object()
+    while True:
+        # next() blocks until the worker decodes more text, so run it off
+        # the event loop
+        chunk = await asyncio.to_thread(next, iterator, sentinel)
+        if chunk is sentinel:
+            break
+        buffer += chunk
+        if buffer.strip() and time.time() - last_edit >= 0.5:
+            # Editing with unchanged text raises; either way keep streaming
+            with contextlib.suppress(Exception):
+                await message.edit_text(buffer)
+            last_edit = time.time()
+
+    try:
+        response = future.result()
+    except Exception as e:
+        logger.error(f"Error generating streamed response: {e}")
+        response = "❌ Erreur lors de la génération de la réponse."
+
+    with contextlib.suppress(Exception):
+        await message.edit_text(response or buffer)
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Log errors caused by Updates."""
     logger.error(f"Update {update} caused error {context.error}")
 
 async def main() -> None:
     """Start the bot."""
+    # Load the model before accepting traffic: the first user no longer
+    # waits out the 30-120s cold start, and the warmup generate leaves the
+    # compile caches hot before any real question arrives
+    await bot_instance.load_model()
+
     # Create the Application
     application = Application.builder().token(bot_instance.telegram_token).build()
     
@@ -358,6 +887,7 @@ async def main() -> None:
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("status", status))
+    application.add_handler(CommandHandler("creative", creative))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     # Register error handler